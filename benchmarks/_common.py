@@ -0,0 +1,123 @@
+"""
+Utilitários compartilhados pelos benchmarks do compilador Noxy
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from dataclasses import dataclass
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+EXAMPLES_DIR = ROOT / "noxy_examples"
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def load_current_compiler():
+    """Importa o compiler.py da árvore de trabalho"""
+    import compiler
+    return compiler
+
+
+def load_compiler_at(revision: str):
+    """Carrega o compiler.py de uma revisão git como módulo isolado (para comparações)"""
+    source = subprocess.check_output(
+        ["git", "show", f"{revision}:compiler.py"], cwd=ROOT
+    ).decode("utf-8")
+    module = types.ModuleType(f"compiler_{revision}")
+    module.__file__ = str(ROOT / "compiler.py")
+    exec(compile(source, f"compiler@{revision}.py", "exec"), module.__dict__)
+    return module
+
+
+def example_corpus(target_bytes: int) -> str:
+    """Gera um código fonte de pelo menos target_bytes concatenando os exemplos inteiros"""
+    sources = [p.read_text(encoding="utf-8") + "\n" for p in sorted(EXAMPLES_DIR.glob("*.nx"))]
+    parts = []
+    size = 0
+    while size < target_bytes:
+        for source in sources:
+            parts.append(source)
+            size += len(source.encode("utf-8"))
+            if size >= target_bytes:
+                break
+    return "".join(parts)
+
+
+def best_of(func, repeat: int = 3) -> float:
+    """Executa func repetidas vezes e retorna o menor tempo (segundos)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# Executa o programa a partir de um interpretador novo e mínimo e escreve no stderr
+# "tempo pico_kb código". O processo criado por vfork/exec herda o pico de RSS do
+# pai (o processo do benchmark, com o compilador e o LLVM carregados, passa de
+# 100 MB), e RUSAGE_CHILDREN ainda incluiria o gcc/ld da ligação; o piso deste
+# executor é ~9 MB.
+_PEAK_MEMORY_RUNNER = """\
+import os, sys, time
+start = time.perf_counter()
+pid = os.posix_spawn(sys.argv[1], sys.argv[1:], os.environ)
+_, status, usage = os.wait4(pid, 0)
+print(time.perf_counter() - start, usage.ru_maxrss, os.waitstatus_to_exitcode(status), file=sys.stderr)
+"""
+
+
+@dataclass
+class BuildResult:
+    """Medidas de uma compilação seguida de execução (build_and_run)"""
+    compile_s: float   # do código fonte ao código objeto
+    ir_lines: int      # linhas do IR antes da otimização
+    object_bytes: int
+    run_s: float
+    peak_kb: int       # pico de RSS do próprio executável
+    output: str        # última linha da saída
+    returncode: int
+
+    def matches(self, expected: str) -> bool:
+        return self.returncode == 0 and self.output == expected
+
+
+def build_and_run(compiler_module, source: str, *, opt_level: str = None, passes=None,
+                  length_prefixed: bool = False) -> BuildResult:
+    """Compila source com compiler_module, liga com o runtime C e executa.
+
+    Só as opções pedidas são repassadas ao NoxyCompiler, para que revisões
+    anteriores a elas (--compare-rev) continuem utilizáveis."""
+    options = {}
+    if opt_level is not None:
+        options["opt_level"] = opt_level
+    if passes is not None:
+        options["passes"] = passes
+    if length_prefixed:
+        options["length_prefixed_strings"] = True
+    with tempfile.TemporaryDirectory() as workdir:
+        executable = os.path.join(workdir, "programa")
+        start = time.perf_counter()
+        pipeline = compiler_module.NoxyCompiler(**options).pipeline(source)
+        object_bytes = len(pipeline.object_code())
+        compile_s = time.perf_counter() - start
+        pipeline.link(executable)
+        result = subprocess.run([sys.executable, "-S", "-I", "-c", _PEAK_MEMORY_RUNNER, executable],
+                                capture_output=True, text=True)
+    run_s, peak_kb, returncode = result.stderr.split()[-3:]
+    output = result.stdout.strip().splitlines()
+    return BuildResult(compile_s, pipeline.llvm_ir().count("\n"), object_bytes, float(run_s), int(peak_kb),
+                       output[-1] if output else "", int(returncode))
+
+
+def report_correct(correct: bool, label: str = "Resultado correto"):
+    """Imprime se as saídas conferem e encerra com código 1 se não"""
+    print(f"{label}: {'sim' if correct else 'NÃO'}")
+    if not correct:
+        raise SystemExit(1)
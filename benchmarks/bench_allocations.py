@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark de estresse do registro de alocações do runtime Noxy
+
+Gera um programa cujo laço principal faz milhões de alocações rastreadas
+(construtores de struct e concatenações de strings), compila, liga com o
+runtime C e mede o tempo de execução e o pico de memória do executável.
+Todas as alocações são registradas por noxy_track_allocation e liberadas
+de uma vez por noxy_free_allocations no fim de main.
+
+Uso:
+    python benchmarks/bench_allocations.py
+    python benchmarks/bench_allocations.py --iterations 2000000
+"""
+
+import argparse
+
+from _common import build_and_run, load_current_compiler, report_correct
+
+PROGRAM_TEMPLATE = """\
+struct Ponto
+    x: int,
+    y: int
+end
+
+let total: int = 0
+let i: int = 0
+while i < {iterations} do
+    let p: Ponto = Ponto(i, i + 1)
+    let rotulo: string = "p" + to_str(p.x)
+    total = total + p.y + strlen(rotulo)
+    i = i + 1
+end
+print(total)
+"""
+
+# Alocações rastreadas por iteração: o struct e o resultado da concatenação
+ALLOCATIONS_PER_ITERATION = 2
+
+
+def expected_total(iterations: int) -> int:
+    return sum(i + 1 + len(f"p{i}") for i in range(iterations))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de estresse do registro de alocações Noxy")
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    result = build_and_run(load_current_compiler(), PROGRAM_TEMPLATE.format(iterations=args.iterations))
+    if result.returncode != 0:
+        raise SystemExit(f"Executável terminou com código {result.returncode}")
+    allocations = args.iterations * ALLOCATIONS_PER_ITERATION
+
+    print(f"Alocações rastreadas: {allocations}")
+    print(f"Execução: {result.run_s:.3f} s ({allocations / result.run_s / 1e6:.1f} milhões de alocações/s)")
+    print(f"Pico de memória: {result.peak_kb / 1024:.1f} MB")
+    report_correct(result.matches(str(expected_total(args.iterations))))
+
+
+if __name__ == "__main__":
+    main()
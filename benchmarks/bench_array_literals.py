@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark de literais de array constantes (tabelas de consulta)
+
+Gera um programa com uma tabela global de tamanho fixo, uma tabela local
+somente leitura dentro de uma função chamada num laço e um array de buckets
+null, todos escritos como literais. Literais só com constantes viram globais
+internos constantes copiados com um único llvm.memcpy (ou memset, se forem
+todos zero) ou lidos no lugar; antes cada elemento era um store no código.
+Mede o tempo de compilação, o tamanho do IR e o tempo de execução.
+
+Com --compare-rev, o mesmo programa é compilado pelo compilador de outra
+revisão git e os resultados são comparados.
+
+Uso:
+    python benchmarks/bench_array_literals.py
+    python benchmarks/bench_array_literals.py --size 1000 --compare-rev <revisão git>
+"""
+
+import argparse
+
+from _common import build_and_run, load_compiler_at, load_current_compiler, report_correct
+
+PROGRAM_TEMPLATE = """\
+struct Node
+    chave: int,
+    proximo: ref Node
+end
+
+func consulta(i: int) -> int
+    let pesos: int[] = [{table}]
+    return pesos[i % {size}]
+end
+
+let tabela: int[{size}] = [{table}]
+let buckets: Node[{size}] = [{nulls}]
+let total: int = 0
+let i: int = 0
+while i < {iterations} do
+    total = total + consulta(i) + tabela[(i * 7) % {size}]
+    i = i + 1
+end
+if buckets[{last}] == null then
+    print(total)
+end
+"""
+
+
+def table_values(size: int):
+    return [(i * 37 + 11) % 1000 for i in range(size)]
+
+
+def expected_total(size: int, iterations: int) -> int:
+    values = table_values(size)
+    return sum(values[i % size] + values[(i * 7) % size] for i in range(iterations))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de literais de array constantes Noxy")
+    parser.add_argument("--compare-rev", help="revisão git usada como referência")
+    parser.add_argument("--size", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    source = PROGRAM_TEMPLATE.format(
+        size=args.size, last=args.size - 1, iterations=args.iterations,
+        table=", ".join(map(str, table_values(args.size))),
+        nulls=", ".join(["null"] * args.size))
+    expected = str(expected_total(args.size, args.iterations))
+
+    current = build_and_run(load_current_compiler(), source)
+    print(f"Tabelas de {args.size} elementos, {args.iterations} consultas")
+    print(f"Atual: compilação {current.compile_s:.3f} s, {current.ir_lines} linhas de IR, "
+          f"execução {current.run_s:.3f} s")
+    correct = current.matches(expected)
+
+    if args.compare_rev:
+        reference = build_and_run(load_compiler_at(args.compare_rev), source)
+        print(f"Em {args.compare_rev}: compilação {reference.compile_s:.3f} s, {reference.ir_lines} linhas de IR, "
+              f"execução {reference.run_s:.3f} s (compilação {reference.compile_s / current.compile_s:.2f}x, "
+              f"execução {reference.run_s / current.run_s:.2f}x)")
+        correct = correct and reference.matches(expected)
+
+    report_correct(correct)
+
+
+if __name__ == "__main__":
+    main()
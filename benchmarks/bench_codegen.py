@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark da geração de código LLVM do Noxy
+
+Gera um programa grande (muitas funções com expressões, chamadas de funções
+embutidas, acessos a strings e arrays) e mede apenas o tempo do
+LLVMCodeGenerator, com a AST já pronta, para isolar o custo do despacho
+entre os geradores de cada tipo de nó.
+
+Com --compare-rev, o mesmo programa é compilado pelo gerador de outra revisão
+git; os dois IRs são comparados para garantir que a saída é idêntica.
+
+Uso:
+    python benchmarks/bench_codegen.py
+    python benchmarks/bench_codegen.py --compare-rev <revisão git> --functions 400
+"""
+
+import argparse
+
+from _common import best_of, load_compiler_at, load_current_compiler
+
+FUNCTION_TEMPLATE = """\
+func calc{n}(v: int[], s: string, k: int) -> int
+    let a: int = v[0] + k * {n}
+    let b: float = to_float(a) * 1.5
+    let t: string = "f{n}: " + to_str(a) + " " + to_str(b)
+    let c: int = ord(s[0]) + length(v) - to_int(b)
+    let ok: bool = !(a > c) & (k != {n}) | a % 2 == 0
+    let i: int = 0
+    while i < k do
+        if ok then
+            a = a + -i * 2
+        else
+            a = a - (i + c) / 3
+        end
+        i = i + 1
+    end
+    print(t)
+    return a + c
+end
+"""
+
+
+def generate_program(functions: int) -> str:
+    parts = [FUNCTION_TEMPLATE.format(n=n) for n in range(functions)]
+    parts.append("let dados: int[4] = [1, 2, 3, 4]")
+    parts += [f'print(calc{n}(dados, "xyz", {n % 7}))' for n in range(functions)]
+    return "\n".join(parts) + "\n"
+
+
+def codegen_time(compiler_module, source: str, repeat: int):
+    lexer = compiler_module.Lexer(source)
+    ast = compiler_module.Parser(lexer.tokenize(), lexer.source_lines).parse()
+
+    def generate():
+        generator = compiler_module.LLVMCodeGenerator(lexer.source_lines)
+        return generator.generate(ast)
+
+    return best_of(generate, repeat), str(generate())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da geração de código Noxy")
+    parser.add_argument("--compare-rev", help="revisão git usada como referência")
+    parser.add_argument("--functions", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    source = generate_program(args.functions)
+    current = load_current_compiler()
+    elapsed, module_ir = codegen_time(current, source, args.repeat)
+
+    print(f"Fonte: {len(source) // 1024} KB, {args.functions} funções, IR com {module_ir.count(chr(10))} linhas")
+    print(f"Codegen atual: {elapsed:.3f} s")
+
+    if args.compare_rev:
+        baseline = load_compiler_at(args.compare_rev)
+        reference, reference_ir = codegen_time(baseline, source, args.repeat)
+        print(f"Codegen em {args.compare_rev}: {reference:.3f} s (speedup {reference / elapsed:.2f}x)")
+        same = module_ir == reference_ir
+        print(f"IRs idênticos: {'sim' if same else 'NÃO'}")
+        if not same:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark de cadeias de concatenação (linhas de log)
+
+Gera um programa que monta, num laço, linhas de log com oito partes unidas por
+`+` (literais, to_str de números e strings de variáveis). Com a concatenação
+fundida cada linha custa uma única alocação e um memcpy por parte; antes eram
+sete alocações intermediárias e strcat relendo o prefixo a cada passo.
+
+Com --compare-rev, o mesmo programa é compilado pelo compilador de outra
+revisão git e os tempos são comparados.
+
+Uso:
+    python benchmarks/bench_concat_chain.py
+    python benchmarks/bench_concat_chain.py --iterations 1000000 --compare-rev <revisão git>
+"""
+
+import argparse
+
+from _common import build_and_run, load_compiler_at, load_current_compiler, report_correct
+
+PROGRAM_TEMPLATE = """\
+func linha_de_log(nivel: string, modulo: string, i: int, tempo: float) -> int
+    let linha: string = "[" + nivel + "] " + modulo + ": requisição " + to_str(i) + " em " + to_str(tempo)
+    return strlen(linha)
+end
+
+let total: int = 0
+let i: int = 0
+while i < {iterations} do
+    if i % 3 == 0 then
+        total = total + linha_de_log("INFO", "servidor.http", i, 0.25)
+    else
+        total = total + linha_de_log("DEBUG", "cache", i, 1.5)
+    end
+    i = i + 1
+end
+print(total)
+"""
+
+
+def expected_total(iterations: int) -> int:
+    total = 0
+    for i in range(iterations):
+        if i % 3 == 0:
+            total += len(f"[INFO] servidor.http: requisição {i} em 0.250000".encode("utf-8"))
+        else:
+            total += len(f"[DEBUG] cache: requisição {i} em 1.500000".encode("utf-8"))
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de cadeias de concatenação Noxy")
+    parser.add_argument("--compare-rev", help="revisão git usada como referência")
+    parser.add_argument("--iterations", type=int, default=500_000)
+    args = parser.parse_args()
+
+    source = PROGRAM_TEMPLATE.format(iterations=args.iterations)
+    expected = str(expected_total(args.iterations))
+
+    current = build_and_run(load_current_compiler(), source)
+    print(f"Linhas de log: {args.iterations} (8 partes cada)")
+    print(f"Execução atual: {current.run_s:.3f} s")
+    correct = current.matches(expected)
+
+    if args.compare_rev:
+        reference = build_and_run(load_compiler_at(args.compare_rev), source)
+        print(f"Execução em {args.compare_rev}: {reference.run_s:.3f} s (speedup {reference.run_s / current.run_s:.2f}x)")
+        correct = correct and reference.matches(expected)
+
+    report_correct(correct)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark do laço for contado comparado ao while equivalente
+
+Gera dois programas com o mesmo kernel (conta as ocorrências de um caractere
+numa string longa, gravando o contador num array, repetido várias vezes): um
+escrito com `for i in 0..strlen(s) do`, outro com `while i < strlen(s) do`.
+No while o limite é reavaliado a cada iteração; o for avalia início, fim e
+passo uma única vez e entrega um laço canônico com número de iterações
+conhecido. Os tempos e as saídas são comparados.
+
+Em -O1, -O2 e -O3 o pipeline do novo pass manager consegue tirar o strlen do
+while (o corpo só escreve em contagem, que não aponta para a string) e os dois
+laços ficam equivalentes; em -O0, -Os e -Oz o while continua quadrático.
+
+Uso:
+    python benchmarks/bench_for_loop.py
+    python benchmarks/bench_for_loop.py --length 8192 --repeat 200 --opt-level s
+"""
+
+import argparse
+
+from _common import build_and_run, load_current_compiler, report_correct
+
+KERNEL_FOR = """\
+func conta(s: string, alvo: char, contagem: int[]) -> int
+    for i in 0..strlen(s) do
+        if s[i] == alvo then
+            contagem[0] = contagem[0] + 1
+        end
+    end
+    return contagem[0]
+end
+"""
+
+KERNEL_WHILE = """\
+func conta(s: string, alvo: char, contagem: int[]) -> int
+    let i: int = 0
+    while i < strlen(s) do
+        if s[i] == alvo then
+            contagem[0] = contagem[0] + 1
+        end
+        i = i + 1
+    end
+    return contagem[0]
+end
+"""
+
+DRIVER_TEMPLATE = """\
+let sb: StringBuilder = string_builder()
+let k: int = 0
+while k < {length} / 4 do
+    sb_append(sb, "abca")
+    k = k + 1
+end
+let texto: string = sb_to_str(sb)
+let contagem: int[1] = [0]
+let r: int = 0
+while r < {repeat} do
+    conta(texto, texto[0], contagem)
+    r = r + 1
+end
+print(contagem[0])
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do laço for Noxy")
+    parser.add_argument("--length", type=int, default=4096)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--opt-level", help="nível de otimização (0, 1, 2, 3, s ou z; padrão do compilador)")
+    args = parser.parse_args()
+
+    compiler = load_current_compiler()
+    driver = DRIVER_TEMPLATE.format(length=args.length, repeat=args.repeat)
+    expected = str(args.length // 2 * args.repeat)
+    while_loop = build_and_run(compiler, KERNEL_WHILE + driver, opt_level=args.opt_level)
+    for_loop = build_and_run(compiler, KERNEL_FOR + driver, opt_level=args.opt_level)
+
+    level = args.opt_level or compiler.NoxyCompiler.DEFAULT_OPT_LEVEL
+    print(f"String de {args.length} caracteres, {args.repeat} contagens, -O{level}")
+    print(f"while: {while_loop.run_s:.3f} s")
+    print(f"for:   {for_loop.run_s:.3f} s (speedup {while_loop.run_s / for_loop.run_s:.2f}x)")
+    report_correct(while_loop.matches(expected) and for_loop.matches(expected), "Resultados corretos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Benchmark do lexer do Noxy
+
+Mede a vazão de tokenização sobre fontes de 256 KB, 512 KB e 1 MB gerados a
+partir dos exemplos, verificando que o tempo cresce linearmente com o tamanho.
+
+Uso:
+    python benchmarks/bench_lexer.py
+    python benchmarks/bench_lexer.py --compare-rev <revisão git>   # compara com outra versão
+"""
+
+import argparse
+
+from _common import best_of, example_corpus, load_compiler_at, load_current_compiler
+
+SIZES = [256 * 1024, 512 * 1024, 1024 * 1024]
+
+
+def tokenize_time(compiler_module, source: str, repeat: int) -> float:
+    return best_of(lambda: compiler_module.Lexer(source).tokenize(), repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do lexer Noxy")
+    parser.add_argument("--compare-rev", help="revisão git usada como referência")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    current = load_current_compiler()
+    baseline = load_compiler_at(args.compare_rev) if args.compare_rev else None
+
+    print(f"{'tamanho':>10} {'tokens':>10} {'tempo (s)':>10} {'MB/s':>8}" + (f" {'referência (s)':>15} {'speedup':>8}" if baseline else ""))
+    for size in SIZES:
+        source = example_corpus(size)
+        mb = len(source.encode("utf-8")) / (1024 * 1024)
+        token_count = len(current.Lexer(source).tokenize())
+        elapsed = tokenize_time(current, source, args.repeat)
+        line = f"{len(source) // 1024:>8}KB {token_count:>10} {elapsed:>10.3f} {mb / elapsed:>8.2f}"
+        if baseline:
+            reference = tokenize_time(baseline, source, args.repeat)
+            line += f" {reference:>15.3f} {reference / elapsed:>7.1f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
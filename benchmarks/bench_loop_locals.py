@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark de regressão para variáveis locais declaradas dentro de laços
+
+Gera um programa com um laço de um milhão de iterações que declara várias
+variáveis locais (int, float, bool e array de tamanho fixo passado para outra
+função, o que impede o otimizador de removê-lo) a cada iteração, dentro de
+uma função e no código do topo. Com as allocas no bloco de entrada
+cada variável tem um único slot por função; se elas voltassem a ser emitidas
+no corpo do laço, a pilha cresceria a cada iteração até estourar.
+
+Com --compare-rev, o mesmo programa é compilado pelo compilador de outra
+revisão git e o resultado (ou a falha) é exibido para comparação.
+
+Uso:
+    python benchmarks/bench_loop_locals.py
+    python benchmarks/bench_loop_locals.py --iterations 1000000 --compare-rev <revisão git>
+"""
+
+import argparse
+
+from _common import build_and_run, load_compiler_at, load_current_compiler, report_correct
+
+PROGRAM_TEMPLATE = """\
+func maior(v: int[], n: int) -> int
+    let m: int = v[0]
+    let i: int = 1
+    while i < n do
+        if v[i] > m then
+            m = v[i]
+        end
+        i = i + 1
+    end
+    return m
+end
+
+func soma_janela(n: int) -> int
+    let total: int = 0
+    let i: int = 0
+    while i < n do
+        let a: int = i % 7
+        let b: float = to_float(a) * 0.5
+        let janela: int[3] = [a, a + 1, a + 2]
+        let par: bool = a % 2 == 0
+        if par then
+            total = total + maior(janela, 3) + to_int(b)
+        else
+            total = total + janela[0]
+        end
+        i = i + 1
+    end
+    return total
+end
+
+let resultado: int = soma_janela({iterations})
+let j: int = 0
+while j < {iterations} do
+    let k: int[2] = [j * 2, j]
+    resultado = resultado + maior(k, 2) % 3
+    j = j + 1
+end
+print(resultado)
+"""
+
+
+def expected_result(iterations: int) -> int:
+    total = 0
+    for i in range(iterations):
+        a = i % 7
+        total += a + 2 + int(a * 0.5) if a % 2 == 0 else a
+    return total + sum((j * 2) % 3 for j in range(iterations))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de variáveis locais em laços Noxy")
+    parser.add_argument("--compare-rev", help="revisão git usada como referência")
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    source = PROGRAM_TEMPLATE.format(iterations=args.iterations)
+    expected = str(expected_result(args.iterations))
+
+    current = build_and_run(load_current_compiler(), source)
+    print(f"Iterações: {args.iterations} (função e código do topo)")
+    print(f"Execução atual: {current.run_s:.3f} s, código de retorno {current.returncode}")
+
+    if args.compare_rev:
+        reference = build_and_run(load_compiler_at(args.compare_rev), source)
+        status = "ok" if reference.matches(expected) else f"falhou (código {reference.returncode})"
+        print(f"Execução em {args.compare_rev}: {reference.run_s:.3f} s, {status}")
+
+    report_correct(current.matches(expected))
+
+
+if __name__ == "__main__":
+    main()
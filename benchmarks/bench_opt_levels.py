@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos níveis de otimização (-O0 ... -Oz)
+
+Compila o mesmo programa (crivo de Eratóstenes e soma de quadrados em laços
+for, com chamadas de função pequenas) em cada nível e mede o tempo de
+compilação, o tamanho do código objeto e o tempo de execução. As saídas de
+todos os níveis devem ser iguais.
+
+Para cada configuração também é conferido que `--time-passes=json` escreve no
+stderr um JSON válido com os passes LLVM da fase de otimização (o novo pass
+manager imprime o próprio relatório no stderr, que o compilador precisa capturar).
+
+Com --passes, um pipeline personalizado (ex.: sroa,instruction-combining,gvn,licm)
+é medido junto com os níveis.
+
+Uso:
+    python benchmarks/bench_opt_levels.py
+    python benchmarks/bench_opt_levels.py --limit 50000000 --passes sroa,instruction-combining,gvn,licm
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from _common import ROOT, build_and_run, load_current_compiler, report_correct
+
+PROGRAM_TEMPLATE = """\
+func quadrado(x: int) -> int
+    return x * x
+end
+
+func conta_primos(n: int) -> int
+    let composto: bool[] = zeros(n + 1)
+    let total: int = 0
+    for i in 2..n + 1 do
+        if !composto[i] then
+            total = total + 1
+            for j in i * i..n + 1 step i do
+                composto[j] = true
+            end
+        end
+    end
+    return total
+end
+
+func soma_quadrados(n: int) -> int
+    let soma: int = 0
+    for i in 0..n do
+        soma = (soma + quadrado(i % 1000)) % 1000000007
+    end
+    return soma
+end
+
+print(conta_primos({limit}))
+print(soma_quadrados({limit}))
+"""
+
+
+def optimization_pass_count(source: str, opt_flag: str):
+    """Passes LLVM da fase 'Otimização' no relatório de --time-passes=json (None se o JSON for inválido)"""
+    with tempfile.TemporaryDirectory() as workdir:
+        source_file = os.path.join(workdir, "bench_opt_levels.nx")
+        with open(source_file, "w", encoding="utf-8") as f:
+            f.write(source)
+        result = subprocess.run([sys.executable, str(ROOT / "compiler.py"), "--compile", "--time-passes=json",
+                                 opt_flag, source_file], capture_output=True, text=True, cwd=workdir)
+    try:
+        report = json.loads(result.stderr)
+    except ValueError:
+        return None
+    return sum(1 for llvm_pass in report["llvm_passes"] if llvm_pass["phase"] == "Otimização")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos níveis de otimização Noxy")
+    parser.add_argument("--limit", type=int, default=20_000_000)
+    parser.add_argument("--passes", help="pipeline personalizado medido junto com os níveis")
+    args = parser.parse_args()
+
+    compiler = load_current_compiler()
+    source = PROGRAM_TEMPLATE.format(limit=args.limit)
+    configurations = [(f"-O{level}", level, None) for level in compiler.NoxyCompiler.OPT_LEVELS]
+    if args.passes:
+        configurations.append((f"--passes={args.passes}", compiler.NoxyCompiler.DEFAULT_OPT_LEVEL,
+                               args.passes.split(",")))
+
+    print(f"Limite: {args.limit}")
+    print(f"{'Configuração':<16} {'Compilação':>11} {'Objeto':>10} {'Execução':>10} {'Passes':>7}")
+    outputs = set()
+    correct = True
+    for label, level, passes in configurations:
+        result = build_and_run(compiler, source, opt_level=level, passes=passes)
+        pass_count = optimization_pass_count(source, label)
+        print(f"{label:<16} {result.compile_s:>9.3f} s {result.object_bytes:>8} B {result.run_s:>8.3f} s "
+              f"{'JSON inválido' if pass_count is None else pass_count:>7}")
+        outputs.add(result.output)
+        correct = correct and result.returncode == 0 and bool(pass_count)
+
+    report_correct(correct and len(outputs) == 1, "Resultados corretos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark do parser de expressões do Noxy
+
+Gera um programa com expressões aninhadas (no estilo de kernels numéricos
+gerados automaticamente) e mede a vazão do parser, com os tokens já prontos,
+para isolar o custo da análise sintática.
+
+Com --compare-rev, o mesmo programa é analisado pelo parser de outra revisão
+git; as duas ASTs são comparadas para garantir que a saída é idêntica.
+
+Uso:
+    python benchmarks/bench_parser.py
+    python benchmarks/bench_parser.py --compare-rev <revisão git> --depth 8
+"""
+
+import argparse
+import random
+
+from _common import best_of, load_compiler_at, load_current_compiler
+
+BINARY_OPERATORS = ["+", "-", "*", "/", "%", "<", ">=", "==", "!=", "&", "|"]
+
+
+def random_expression(rng: random.Random, depth: int) -> str:
+    """Expressão aleatória com até depth níveis de parênteses"""
+    if depth == 0:
+        return rng.choice(["a", "b", "c", "x", str(rng.randint(0, 99)), "v[i]", "f(a, b)"])
+    parts = [random_expression(rng, depth - 1) for _ in range(rng.randint(2, 4))]
+    expression = parts[0]
+    for part in parts[1:]:
+        expression += f" {rng.choice(BINARY_OPERATORS)} {part}"
+    prefix = rng.choice(["", "", "-", "!"])
+    return f"{prefix}({expression})"
+
+
+def generate_program(statements: int, depth: int, seed: int = 42) -> str:
+    rng = random.Random(seed)
+    lines = ["func f(p: int, q: int) -> int", "    return p + q", "end"]
+    lines += [f"let r{n}: int = {random_expression(rng, depth)}" for n in range(statements)]
+    return "\n".join(lines) + "\n"
+
+
+def parse_time(compiler_module, source: str, repeat: int):
+    lexer = compiler_module.Lexer(source)
+    tokens = lexer.tokenize()
+    parse = lambda: compiler_module.Parser(tokens, lexer.source_lines).parse()
+    return best_of(parse, repeat), parse()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do parser de expressões Noxy")
+    parser.add_argument("--compare-rev", help="revisão git usada como referência")
+    parser.add_argument("--statements", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    source = generate_program(args.statements, args.depth)
+    current = load_current_compiler()
+    elapsed, ast = parse_time(current, source, args.repeat)
+    token_count = len(current.Lexer(source).tokenize())
+
+    print(f"Fonte: {len(source) // 1024} KB, {token_count} tokens, profundidade {args.depth}")
+    print(f"Parser atual: {elapsed:.3f} s ({token_count / elapsed / 1000:.0f} mil tokens/s)")
+
+    if args.compare_rev:
+        baseline = load_compiler_at(args.compare_rev)
+        reference, reference_ast = parse_time(baseline, source, args.repeat)
+        print(f"Parser em {args.compare_rev}: {reference:.3f} s (speedup {reference / elapsed:.2f}x)")
+        same = repr(ast) == repr(reference_ast)
+        print(f"ASTs idênticas: {'sim' if same else 'NÃO'}")
+        if not same:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
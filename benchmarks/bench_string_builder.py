@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark de montagem de strings grandes com StringBuilder
+
+Gera um programa que monta uma string de 10 MB acrescentando pedaços pequenos
+com sb_append (buffer do runtime que dobra de capacidade) e mede o tempo e o
+pico de memória do executável. Para comparação, o mesmo laço com `s = s + pedaço`
+é executado num tamanho menor (cada concatenação copia o resultado inteiro, então
+o tempo cresce com o quadrado do tamanho final).
+
+Uso:
+    python benchmarks/bench_string_builder.py
+    python benchmarks/bench_string_builder.py --megabytes 10 --concat-kilobytes 256
+"""
+
+import argparse
+
+from _common import build_and_run, load_current_compiler, report_correct
+
+PIECE = "0123456789abcdef"
+
+BUILDER_TEMPLATE = """\
+let sb: StringBuilder = string_builder()
+let i: int = 0
+while i < {pieces} do
+    sb_append(sb, "{piece}")
+    i = i + 1
+end
+print(strlen(sb_to_str(sb)))
+"""
+
+CONCAT_TEMPLATE = """\
+let s: string = ""
+let i: int = 0
+while i < {pieces} do
+    s = s + "{piece}"
+    i = i + 1
+end
+print(strlen(s))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de StringBuilder Noxy")
+    parser.add_argument("--megabytes", type=int, default=10)
+    parser.add_argument("--concat-kilobytes", type=int, default=256)
+    args = parser.parse_args()
+
+    compiler = load_current_compiler()
+    pieces = args.megabytes * 1024 * 1024 // len(PIECE)
+    source = BUILDER_TEMPLATE.format(pieces=pieces, piece=PIECE)
+    builder = build_and_run(compiler, source)
+
+    print(f"StringBuilder: {args.megabytes} MB em {pieces} sb_append")
+    print(f"Execução: {builder.run_s:.3f} s ({args.megabytes / builder.run_s:.0f} MB/s), "
+          f"pico de memória {builder.peak_kb / 1024:.1f} MB")
+    correct = builder.matches(str(pieces * len(PIECE)))
+
+    concat_pieces = args.concat_kilobytes * 1024 // len(PIECE)
+    source = CONCAT_TEMPLATE.format(pieces=concat_pieces, piece=PIECE)
+    concat = build_and_run(compiler, source)
+    print(f"Concatenação com +: {args.concat_kilobytes} KB em {concat.run_s:.3f} s "
+          f"({args.concat_kilobytes / 1024 / concat.run_s:.1f} MB/s)")
+    correct = correct and concat.matches(str(concat_pieces * len(PIECE)))
+
+    report_correct(correct, "Resultados corretos")
+
+
+if __name__ == "__main__":
+    main()
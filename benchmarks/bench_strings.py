@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark das operações de string com e sem --length-prefixed-strings
+
+Monta (com StringBuilder) quatro strings de mesmo tamanho e, num laço, soma o
+strlen de uma delas e a compara com outra, escolhendo as duas pelo índice da
+iteração: como a string muda a cada volta, o LLVM não pode tirar o strlen nem a
+comparação do laço. Com strings C cada operação percorre a string inteira; com o
+cabeçalho elas leem o tamanho em O(1) (strings de tamanhos iguais ainda são
+comparadas com memcmp, mas aqui elas diferem já no primeiro caractere).
+
+Para medir só o laço, cada programa é executado também com zero iterações e
+esse tempo (montagem das strings, início do processo) é descontado; de cada
+um vale a melhor de três execuções. A tabela
+mostra o tempo nas duas representações para vários tamanhos de string: com
+strings C ele cresce com o tamanho, com o cabeçalho fica constante.
+
+Uso:
+    python benchmarks/bench_strings.py
+    python benchmarks/bench_strings.py --lengths 1000,10000,100000 --iterations 200000
+"""
+
+import argparse
+
+from _common import build_and_run, load_current_compiler, report_correct
+
+PROGRAM_TEMPLATE = """\
+func repete(parte: string, vezes: int) -> string
+    let sb: StringBuilder = string_builder()
+    for k in 0..vezes do
+        sb_append(sb, parte)
+    end
+    return sb_to_str(sb)
+end
+
+let textos: string[4] = [repete("a", {length}), repete("b", {length}), repete("c", {length}), repete("d", {length})]
+
+func mede(n: int) -> int
+    let total: int = 0
+    for i in 0..n do
+        total = total + strlen(textos[i % 4])
+        if textos[i % 4] == textos[(i + 1) % 4] then
+            total = total + 1
+        end
+    end
+    return total
+end
+
+print(mede({iterations}))
+"""
+
+
+def loop_time(compiler, length: int, iterations: int, length_prefixed: bool, repeat: int = 3):
+    """Tempo só do laço medido: melhor execução com iterations menos melhor execução com zero iterações"""
+    correct = True
+    best = {}
+    for count, expected in ((0, "0"), (iterations, str(iterations * length))):
+        source = PROGRAM_TEMPLATE.format(length=length, iterations=count)
+        runs = [build_and_run(compiler, source, length_prefixed=length_prefixed) for _ in range(repeat)]
+        correct = correct and all(run.matches(expected) for run in runs)
+        best[count] = min(run.run_s for run in runs)
+    return max(best[iterations] - best[0], 0.0), correct
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de strings Noxy com prefixo de tamanho")
+    parser.add_argument("--lengths", default="100,1000,10000,50000",
+                        help="tamanhos de string separados por vírgula")
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    compiler = load_current_compiler()
+    print(f"{args.iterations} iterações de strlen + comparação")
+    print(f"{'Tamanho':>8} {'Strings C':>11} {'Com cabeçalho':>14} {'Speedup':>9}")
+    correct = True
+    for length in (int(value) for value in args.lengths.split(",")):
+        plain, plain_correct = loop_time(compiler, length, args.iterations, False)
+        prefixed, prefixed_correct = loop_time(compiler, length, args.iterations, True)
+        speedup = f"{plain / prefixed:.1f}x" if prefixed > 0 else "-"
+        print(f"{length:>8} {plain:>9.4f} s {prefixed:>12.4f} s {speedup:>9}")
+        correct = correct and plain_correct and prefixed_correct
+
+    report_correct(correct, "Resultados corretos")
+
+
+if __name__ == "__main__":
+    main()
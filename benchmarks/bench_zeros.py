@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark de zeros() com arrays grandes
+
+Compila um programa com um array global e um local de tamanho fixo inicializados
+com zeros() e mede o tempo de compilação (até o objeto otimizado) e o tamanho
+do IR. Com llvm.memset/calloc cada zeros() vira uma única chamada; antes eram
+gerados um store por elemento no buffer e outro load/store por elemento na
+cópia para a variável, e o IR crescia com o tamanho do array.
+
+Com --compare-rev, o mesmo programa é compilado pelo compilador de outra
+revisão git e os tempos são comparados.
+
+Uso:
+    python benchmarks/bench_zeros.py
+    python benchmarks/bench_zeros.py --size 5000 --compare-rev <revisão git>
+"""
+
+import argparse
+
+from _common import build_and_run, load_compiler_at, load_current_compiler, report_correct
+
+PROGRAM_TEMPLATE = """\
+func conta(n: int) -> int
+    let marcas: int[{size}] = zeros({size})
+    let i: int = 0
+    while i < n do
+        marcas[i % {size}] = marcas[i % {size}] + 1
+        i = i + 1
+    end
+    return marcas[0]
+end
+
+let tabela: int[{size}] = zeros({size})
+tabela[{last}] = conta({size} * 3)
+print(tabela[{last}] + tabela[0])
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de zeros() Noxy")
+    parser.add_argument("--compare-rev", help="revisão git usada como referência")
+    parser.add_argument("--size", type=int, default=2_000)
+    args = parser.parse_args()
+
+    source = PROGRAM_TEMPLATE.format(size=args.size, last=args.size - 1)
+
+    current = build_and_run(load_current_compiler(), source)
+    print(f"zeros({args.size}) em um array global e um local")
+    print(f"Compilação atual: {current.compile_s:.3f} s, {current.ir_lines} linhas de IR")
+    correct = current.matches("3")
+
+    if args.compare_rev:
+        reference = build_and_run(load_compiler_at(args.compare_rev), source)
+        print(f"Compilação em {args.compare_rev}: {reference.compile_s:.3f} s, {reference.ir_lines} linhas de IR "
+              f"(speedup {reference.compile_s / current.compile_s:.2f}x)")
+        correct = correct and reference.matches("3")
+
+    report_correct(correct)
+
+
+if __name__ == "__main__":
+    main()
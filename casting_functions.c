@@ -131,4 +131,290 @@ char* char_to_str(char c) {
     buffer[0] = c;
     buffer[1] = '\0';
     return buffer;
-} 
\ No newline at end of file
+} 
+
+// Passo zero só conhecido em tempo de execução no laço for (um literal 0 é erro de compilação)
+void noxy_for_zero_step(void) {
+    fflush(stdout);
+    fprintf(stderr, "Erro: o passo do 'for' não pode ser zero\n");
+    exit(1);
+}
+
+// Registro de alocações do programa: vetor que cresce dobrando de capacidade.
+// O código gerado registra cada bloco alocado e libera todos de uma vez no fim de main.
+// As primeiras posições ficam em memória estática, sem malloc para programas pequenos.
+#define NOXY_INITIAL_ALLOCATIONS 256
+static void* noxy_initial_allocations[NOXY_INITIAL_ALLOCATIONS];
+static void** noxy_allocations = noxy_initial_allocations;
+static long long noxy_allocation_count = 0;
+static long long noxy_allocation_capacity = NOXY_INITIAL_ALLOCATIONS;
+
+// Registra ptr para ser liberado no fim do programa (O(1) amortizado)
+void noxy_track_allocation(void* ptr) {
+    if (ptr == NULL) {
+        return;
+    }
+    if (noxy_allocation_count == noxy_allocation_capacity) {
+        long long capacity = noxy_allocation_capacity * 2;
+        void** grown;
+        if (noxy_allocations == noxy_initial_allocations) {
+            grown = malloc(capacity * sizeof(void*));
+            if (grown != NULL) {
+                memcpy(grown, noxy_initial_allocations, sizeof(noxy_initial_allocations));
+            }
+        } else {
+            grown = realloc(noxy_allocations, capacity * sizeof(void*));
+        }
+        if (grown == NULL) {
+            return;  // Sem memória para o registro: o bloco apenas não será liberado
+        }
+        noxy_allocations = grown;
+        noxy_allocation_capacity = capacity;
+    }
+    noxy_allocations[noxy_allocation_count++] = ptr;
+}
+
+static void noxy_sb_release(void);
+
+// Libera todos os blocos registrados, o próprio registro e os StringBuilders
+void noxy_free_allocations(void) {
+    for (long long i = 0; i < noxy_allocation_count; i++) {
+        free(noxy_allocations[i]);
+    }
+    if (noxy_allocations != noxy_initial_allocations) {
+        free(noxy_allocations);
+    }
+    noxy_allocations = noxy_initial_allocations;
+    noxy_allocation_count = 0;
+    noxy_allocation_capacity = NOXY_INITIAL_ALLOCATIONS;
+    noxy_sb_release();
+}
+
+// Arena para temporários de vida curta (resultados intermediários de concatenações,
+// conversões para string consumidas no mesmo statement). Alocação por incremento de
+// ponteiro em blocos encadeados; o código gerado marca a posição na entrada de funções
+// e laços e volta a ela em cada iteração e antes de cada return.
+#define NOXY_ARENA_CHUNK_SIZE (64 * 1024)
+#define NOXY_ARENA_ALIGNMENT 16
+
+typedef struct NoxyArenaChunk {
+    struct NoxyArenaChunk* previous;
+    size_t size;
+    size_t used;
+    char data[];
+} NoxyArenaChunk;
+
+static NoxyArenaChunk* noxy_arena = NULL;       // Bloco atual (topo da pilha de blocos)
+static NoxyArenaChunk* noxy_arena_spare = NULL; // Blocos devolvidos, reaproveitados antes de um novo malloc
+
+// Aloca size bytes na arena; válido até o próximo reset para uma marca anterior
+void* noxy_arena_alloc(long long size) {
+    size_t needed = ((size_t)size + NOXY_ARENA_ALIGNMENT - 1) & ~(size_t)(NOXY_ARENA_ALIGNMENT - 1);
+    if (noxy_arena == NULL || noxy_arena->size - noxy_arena->used < needed) {
+        NoxyArenaChunk* chunk = NULL;
+        if (noxy_arena_spare != NULL && noxy_arena_spare->size >= needed) {
+            chunk = noxy_arena_spare;
+            noxy_arena_spare = chunk->previous;
+        } else {
+            size_t chunk_size = needed > NOXY_ARENA_CHUNK_SIZE ? needed : NOXY_ARENA_CHUNK_SIZE;
+            chunk = malloc(sizeof(NoxyArenaChunk) + chunk_size);
+            if (chunk == NULL) {
+                return NULL;
+            }
+            chunk->size = chunk_size;
+        }
+        chunk->used = 0;
+        chunk->previous = noxy_arena;
+        noxy_arena = chunk;
+    }
+    void* ptr = noxy_arena->data + noxy_arena->used;
+    noxy_arena->used += needed;
+    return ptr;
+}
+
+// Posição atual da arena, para um noxy_arena_reset posterior
+void* noxy_arena_mark(void) {
+    return noxy_arena == NULL ? NULL : noxy_arena->data + noxy_arena->used;
+}
+
+// Descarta tudo o que foi alocado na arena depois de mark
+void noxy_arena_reset(void* mark) {
+    char* position = mark;
+    while (noxy_arena != NULL &&
+           (position < noxy_arena->data || position > noxy_arena->data + noxy_arena->size)) {
+        NoxyArenaChunk* chunk = noxy_arena;
+        noxy_arena = chunk->previous;
+        chunk->previous = noxy_arena_spare;
+        noxy_arena_spare = chunk;
+    }
+    if (noxy_arena != NULL) {
+        noxy_arena->used = position - noxy_arena->data;
+    }
+}
+
+// Libera todos os blocos da arena (fim do programa)
+void noxy_arena_release(void) {
+    noxy_arena_reset(NULL);
+    while (noxy_arena_spare != NULL) {
+        NoxyArenaChunk* chunk = noxy_arena_spare;
+        noxy_arena_spare = chunk->previous;
+        free(chunk);
+    }
+}
+
+// to_str_int / to_str_float com o resultado na arena
+char* noxy_arena_to_str_int(long long value) {
+    char* buffer = noxy_arena_alloc(32);
+    if (buffer == NULL) {
+        return NULL;
+    }
+    sprintf(buffer, "%lld", value);
+    return buffer;
+}
+
+char* noxy_arena_to_str_float(double value) {
+    int length = snprintf(NULL, 0, "%.6f", value);
+    char* buffer = noxy_arena_alloc(length + 1);
+    if (buffer == NULL) {
+        return NULL;
+    }
+    sprintf(buffer, "%.6f", value);
+    return buffer;
+}
+
+// Strings com prefixo de tamanho (opção --length-prefixed-strings): um cabeçalho com o
+// tamanho e a capacidade fica imediatamente antes dos dados. O valor da string continua
+// sendo o ponteiro para os dados, terminados em '\0' para interoperar com funções C.
+typedef struct {
+    long long length;    // Bytes antes do terminador
+    long long capacity;  // Bytes disponíveis para dados (sem contar o terminador)
+} NoxyStringHeader;
+
+// Bloco com cabeçalho para length bytes: na arena ou em malloc registrado
+static char* noxy_lp_new(long long length, int in_arena) {
+    size_t size = sizeof(NoxyStringHeader) + (size_t)length + 1;
+    NoxyStringHeader* header = in_arena ? noxy_arena_alloc(size) : malloc(size);
+    if (header == NULL) {
+        return NULL;
+    }
+    if (!in_arena) {
+        noxy_track_allocation(header);
+    }
+    header->length = length;
+    header->capacity = length;
+    char* data = (char*)(header + 1);
+    data[length] = '\0';
+    return data;
+}
+
+// Converte um resultado do runtime (string C em malloc) para a forma com cabeçalho e libera o original
+char* noxy_lp_adopt(char* s, int in_arena) {
+    if (s == NULL) {
+        return NULL;
+    }
+    long long length = (long long)strlen(s);
+    char* data = noxy_lp_new(length, in_arena);
+    if (data != NULL) {
+        memcpy(data, s, (size_t)length);
+    }
+    free(s);
+    return data;
+}
+
+// to_str_int / to_str_float produzindo strings com cabeçalho
+char* noxy_lp_to_str_int(long long value, int in_arena) {
+    char temp[32];
+    int length = snprintf(temp, sizeof(temp), "%lld", value);
+    char* data = noxy_lp_new(length, in_arena);
+    if (data != NULL) {
+        memcpy(data, temp, (size_t)length);
+    }
+    return data;
+}
+
+char* noxy_lp_to_str_float(double value, int in_arena) {
+    int length = snprintf(NULL, 0, "%.6f", value);
+    char* data = noxy_lp_new(length, in_arena);
+    if (data != NULL) {
+        snprintf(data, (size_t)length + 1, "%.6f", value);
+    }
+    return data;
+}
+
+// StringBuilder: buffer que cresce dobrando de capacidade, para montar strings com
+// sb_append em O(1) amortizado por byte. Os builders ficam numa lista encadeada e são
+// liberados (com os seus buffers) por noxy_free_allocations no fim de main.
+#define NOXY_SB_INITIAL_CAPACITY 16
+
+typedef struct NoxyStringBuilder {
+    struct NoxyStringBuilder* next;
+    char* data;
+    long long length;
+    long long capacity;
+} NoxyStringBuilder;
+
+static NoxyStringBuilder* noxy_builders = NULL;
+
+NoxyStringBuilder* noxy_sb_new(void) {
+    NoxyStringBuilder* sb = malloc(sizeof(NoxyStringBuilder));
+    if (sb == NULL) {
+        return NULL;
+    }
+    sb->data = NULL;
+    sb->length = 0;
+    sb->capacity = 0;
+    sb->next = noxy_builders;
+    noxy_builders = sb;
+    return sb;
+}
+
+// Acrescenta os length primeiros bytes de s (o tamanho vem do código gerado)
+void noxy_sb_append(NoxyStringBuilder* sb, const char* s, long long length) {
+    if (sb == NULL || s == NULL || length <= 0) {
+        return;
+    }
+    if (sb->length + length > sb->capacity) {
+        long long capacity = sb->capacity ? sb->capacity : NOXY_SB_INITIAL_CAPACITY;
+        while (capacity < sb->length + length) {
+            capacity *= 2;
+        }
+        char* grown = realloc(sb->data, (size_t)capacity + 1);
+        if (grown == NULL) {
+            return;
+        }
+        sb->data = grown;
+        sb->capacity = capacity;
+    }
+    memcpy(sb->data + sb->length, s, (size_t)length);
+    sb->length += length;
+}
+
+// Cópia do conteúdo como string (com cabeçalho se length_prefixed), registrada para liberação
+char* noxy_sb_to_str(NoxyStringBuilder* sb, int length_prefixed) {
+    long long length = sb == NULL ? 0 : sb->length;
+    char* result;
+    if (length_prefixed) {
+        result = noxy_lp_new(length, 0);
+    } else {
+        result = malloc((size_t)length + 1);
+        noxy_track_allocation(result);
+    }
+    if (result == NULL) {
+        return NULL;
+    }
+    if (length > 0) {
+        memcpy(result, sb->data, (size_t)length);
+    }
+    result[length] = '\0';
+    return result;
+}
+
+// Libera todos os builders (chamada por noxy_free_allocations)
+static void noxy_sb_release(void) {
+    while (noxy_builders != NULL) {
+        NoxyStringBuilder* sb = noxy_builders;
+        noxy_builders = sb->next;
+        free(sb->data);
+        free(sb);
+    }
+}